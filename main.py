@@ -1,15 +1,52 @@
-import json
-from fastapi import FastAPI, HTTPException, Header
+import orjson
+import msgspec
+import asyncio
+import gzip
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from google.cloud import storage
-from typing import List
+from google.api_core.exceptions import PreconditionFailed
+from typing import List, Optional
 import os
+import re
 import logging
 import httpx
 from datetime import datetime, timedelta, timezone
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared HTTP client so connections to the Singapore API are pooled and kept alive
+    app.state.http_client = httpx.AsyncClient(
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+    )
+    # Single GCS client and bucket handle instead of re-authenticating on every request
+    app.state.gcs = storage.Client()
+    app.state.bucket = app.state.gcs.bucket(BUCKET_NAME)
+    app.state.position_blob = app.state.bucket.blob(POSITION_FILE_NAME)
+    # Fuel consumption table is kept in memory and refreshed in the background
+    app.state.fuel = None
+    app.state.fuel_table = {}
+    app.state.fuel_body = None
+    try:
+        await load_fuel_consumption(app)
+    except Exception as e:
+        logging.warning(f"Failed to load fuel consumption data: {e}")
+    fuel_reload_task = asyncio.create_task(reload_fuel_consumption_periodically(app))
+    yield
+    fuel_reload_task.cancel()
+    # Let pending cache uploads finish so other workers don't refetch from the API
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    await app.state.http_client.aclose()
+    app.state.gcs.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,22 +56,121 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
 BUCKET_NAME = "position-api"
 POSITION_FILE_NAME = "positions/position.txt"
 FUEL_CONSUMPTION_FILE_NAME = "fuel-consumption/ship_speed_consumption.json"
 SINGAPORE_CACHE_FOLDER = "singapore-cache/"  # Folder for caching Singapore API data
+SINGAPORE_CACHE_FILE_NAME = f"{SINGAPORE_CACHE_FOLDER}latest.json"  # Always overwritten with the newest snapshot
 
 # Singapore API configuration
 SINGAPORE_API_URL = os.getenv("SINGAPORE_API_URL", "https://sg-mdh-api.mpa.gov.sg/v1/vessel/positions/snapshot")  # Replace with actual API URL
 
 CACHE_EXPIRY_MINUTES = 10  # Cache expiry time in minutes
+FUEL_RELOAD_MINUTES = 5  # How often the fuel consumption table is checked for changes
+MAX_MALFORMED_VESSEL_SHARE = 0.5  # Above this share of undecodable vessels the snapshot is rejected, not cached
+
+# Matches the "Key: value" lines written by submit_data before positions were stored as JSON
+_POSITION_RE = re.compile(rb"Time:[ \t]*(.*?)\s*\nLatitude:\s*(\S+)\s*\nLongitude:\s*(\S+)")
+
+# In-process copy of the latest Singapore response, so cache hits skip GCS entirely
+_mem_cache = {"expiry": 0.0, "body": None}
+# Refreshes currently in flight, keyed by API key so one caller's bad key never fails another caller's request
+_refresh_tasks = {}
+# Fire-and-forget cache uploads, referenced here so they are not garbage collected mid-flight
+_background_tasks = set()
+
+# Last downloaded contents per blob name as (generation, bytes); unchanged blobs are not downloaded again
+_blob_cache = {}
+_blob_cache_locks = defaultdict(asyncio.Lock)
+# Serializes fuel table loads between the background reload and on-demand loads from requests
+_fuel_load_lock = asyncio.Lock()
 
 class InputData(BaseModel):
     lon: float
     lat: float
     time: str
 
-class VesselParticulars(BaseModel):
+class VesselParticulars(msgspec.Struct, omit_defaults=True):
+    vesselName: Optional[str] = None
+    callSign: Optional[str] = None
+    imoNumber: Optional[str] = None
+    flag: Optional[str] = None
+    vesselLength: Optional[float] = None
+    vesselBreadth: Optional[float] = None
+    vesselDepth: Optional[float] = None
+    vesselType: Optional[str] = None
+    grossTonnage: Optional[float] = None
+    netTonnage: Optional[float] = None
+    deadweight: Optional[float] = None
+    mmsiNumber: Optional[str] = None
+    yearBuilt: Optional[str] = None
+    # snake_case spellings some payloads use; folded into the fields above and never encoded
+    vessel_name: Optional[str] = None
+    call_sign: Optional[str] = None
+    imo_number: Optional[str] = None
+    vessel_length: Optional[float] = None
+    vessel_breadth: Optional[float] = None
+    vessel_depth: Optional[float] = None
+    vessel_type: Optional[str] = None
+    gross_tonnage: Optional[float] = None
+    net_tonnage: Optional[float] = None
+    mmsi_number: Optional[str] = None
+    year_built: Optional[str] = None
+
+    def __post_init__(self):
+        # Missing or null values become "" / 0.0, as the old per-ship transform did
+        self.vesselName = self.vesselName or self.vessel_name or ""
+        self.callSign = self.callSign or self.call_sign or ""
+        self.imoNumber = self.imoNumber or self.imo_number or ""
+        self.flag = self.flag or ""
+        self.vesselLength = self.vesselLength or self.vessel_length or 0.0
+        self.vesselBreadth = self.vesselBreadth or self.vessel_breadth or 0.0
+        self.vesselDepth = self.vesselDepth or self.vessel_depth or 0.0
+        self.vesselType = self.vesselType or self.vessel_type or ""
+        self.grossTonnage = self.grossTonnage or self.gross_tonnage or 0.0
+        self.netTonnage = self.netTonnage or self.net_tonnage or 0.0
+        self.deadweight = self.deadweight or 0.0
+        self.mmsiNumber = self.mmsiNumber or self.mmsi_number or ""
+        self.yearBuilt = self.yearBuilt or self.year_built or ""
+        # Back to the default so omit_defaults leaves them out of the encoded output
+        self.vessel_name = self.call_sign = self.imo_number = None
+        self.vessel_length = self.vessel_breadth = self.vessel_depth = None
+        self.vessel_type = self.gross_tonnage = self.net_tonnage = None
+        self.mmsi_number = self.year_built = None
+
+class SingaporeApiResponse(msgspec.Struct):
+    vesselParticulars: Optional[VesselParticulars] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    latitudeDegrees: Optional[float] = None
+    longitudeDegrees: Optional[float] = None
+    speed: Optional[float] = None
+    course: Optional[float] = None
+    heading: Optional[float] = None
+    timeStamp: Optional[str] = None
+
+    def __post_init__(self):
+        self.latitude = self.latitude or 0.0
+        self.longitude = self.longitude or 0.0
+        if self.latitudeDegrees is None:
+            self.latitudeDegrees = self.latitude
+        if self.longitudeDegrees is None:
+            self.longitudeDegrees = self.longitude
+        self.speed = self.speed or 0.0
+        self.course = self.course or 0.0
+        self.heading = self.heading or 0.0
+        self.timeStamp = self.timeStamp or ""
+
+# Reused for every Singapore API payload; decodes straight into structs without intermediate dicts.
+# Non-strict so numeric strings are coerced to floats like the old per-ship float() calls did
+_SHIPS_RAW_DEC = msgspec.json.Decoder(List[msgspec.Raw])
+_SHIP_DEC = msgspec.json.Decoder(SingaporeApiResponse, strict=False)
+_PARTICULARS_DEC = msgspec.json.Decoder(VesselParticulars, strict=False)
+_SHIPS_ENC = msgspec.json.Encoder()
+
+# Describe the /api/ship response in OpenAPI only; responses are built from the structs above
+class VesselParticularsSchema(BaseModel):
     vesselName: str
     callSign: str
     imoNumber: str
@@ -49,8 +185,8 @@ class VesselParticulars(BaseModel):
     mmsiNumber: str
     yearBuilt: str
 
-class SingaporeApiResponse(BaseModel):
-    vesselParticulars: VesselParticulars
+class SingaporeShipSchema(BaseModel):
+    vesselParticulars: VesselParticularsSchema
     latitude: float
     longitude: float
     latitudeDegrees: float
@@ -60,114 +196,220 @@ class SingaporeApiResponse(BaseModel):
     heading: float
     timeStamp: str
 
-def get_gcs_client():
-    return storage.Client()
-
-
-def get_latest_cache_file():
+def decode_ships(content):
     """
-    Get the most recent cache file from GCS that's within the expiry time.
+    Decode a Singapore API payload into SingaporeApiResponse structs.
+    Ships without a vesselParticulars object have their particulars read from
+    the ship itself. Vessels that still fail to decode are skipped, so one bad
+    entry doesn't fail the whole snapshot.
+    Returns (ships, errors) with one error message per skipped vessel.
+    Raises msgspec.DecodeError if the payload is not a JSON list.
+    """
+    ships = []
+    errors = []
+    for raw in _SHIPS_RAW_DEC.decode(content):
+        try:
+            ship = _SHIP_DEC.decode(raw)
+            if ship.vesselParticulars is None:
+                ship.vesselParticulars = _PARTICULARS_DEC.decode(raw)
+            ships.append(ship)
+        except msgspec.DecodeError as e:
+            errors.append(str(e))
+    return ships, errors
+
+
+def get_latest_cache_file(bucket):
+    """
+    Get the cache file from GCS if it was updated within the expiry time.
     Returns (blob, timestamp) if valid cache exists, (None, None) otherwise.
     """
     try:
-        client = get_gcs_client()
-        bucket = client.bucket(BUCKET_NAME)
+        # Single metadata request; returns None when the cache has never been written
+        blob = bucket.get_blob(SINGAPORE_CACHE_FILE_NAME)
         
-        # List all blobs in the singapore-cache folder
-        blobs = bucket.list_blobs(prefix=SINGAPORE_CACHE_FOLDER)
+        if blob is not None and datetime.now(timezone.utc) - blob.updated <= timedelta(minutes=CACHE_EXPIRY_MINUTES):
+            return blob, blob.updated
         
-        valid_blobs = []
-        current_time = datetime.now(timezone.utc)
+        return None, None
+    except Exception as e:
+        logging.warning(f"Error checking cache file: {e}")
+        return None, None
+
+
+def download_blob(blob):
+    """
+    Download a blob's contents, decompressing it locally if it is stored gzipped.
+    """
+    content = blob.download_as_bytes(if_generation_match=blob.generation, raw_download=True)
+    if blob.content_encoding == "gzip":
+        content = gzip.decompress(content)
+    return content
+
+
+async def download_cached(blob):
+    """
+    Download a blob whose metadata is already loaded, reusing the previous
+    download if its generation has not changed.
+    Returns None if the blob was deleted after its metadata was read.
+    """
+    async with _blob_cache_locks[blob.name]:
+        cached = _blob_cache.get(blob.name)
+        if cached is not None and cached[0] == blob.generation:
+            return cached[1]
         
-        for blob in blobs:
-            # Extract timestamp from filename (format: singapore-cache/YYYY-MM-DD_HH-MM-SS.json)
-            if blob.name.endswith('.json'):
-                try:
-                    filename = blob.name.replace(SINGAPORE_CACHE_FOLDER, '').replace('.json', '')
-                    file_timestamp = datetime.strptime(filename, '%Y-%m-%d_%H-%M-%S').replace(tzinfo=timezone.utc)
+        try:
+            content = await asyncio.to_thread(download_blob, blob)
+        except PreconditionFailed:
+            # Overwritten since the metadata was read; fetch the new generation once
+            blob = await asyncio.to_thread(blob.bucket.get_blob, blob.name)
+            if blob is None:
+                return None
+            content = await asyncio.to_thread(download_blob, blob)
+        _blob_cache[blob.name] = (blob.generation, content)
+        return content
+
+
+async def get_cached_blob_content(bucket, name):
+    """
+    Return the contents of a blob, or None if it does not exist.
+    Only the metadata is fetched when the contents are already cached.
+    """
+    blob = await asyncio.to_thread(bucket.get_blob, name)
+    if blob is None:
+        return None
+    return await download_cached(blob)
+
 
-                    
-                    # Check if file is within expiry time
-                    if current_time - file_timestamp <= timedelta(minutes=CACHE_EXPIRY_MINUTES):
-                        valid_blobs.append((blob, file_timestamp))
+def build_fuel_table(fuel):
+    """
+    Flatten the fuel consumption JSON into a (category, vessel_type, speed) -> value dict.
+    Entries that don't have the expected shape, or speeds that aren't integers, are skipped.
+    """
+    table = {}
+    if not isinstance(fuel, dict):
+        return table
+    for category, vessels in fuel.items():
+        if not isinstance(vessels, dict):
+            continue
+        for vessel_type, vessel_info in vessels.items():
+            if not isinstance(vessel_info, dict):
+                continue
+            speeds = vessel_info.get("fuel_consumption_tpd")
+            if not isinstance(speeds, dict):
+                continue
+            for speed, value in speeds.items():
+                try:
+                    table[(category, vessel_type, int(speed))] = value
                 except ValueError:
-                    # Skip files with invalid timestamp format
                     continue
-        
-        if valid_blobs:
-            # Return the most recent valid cache file
-            latest_blob, latest_timestamp = max(valid_blobs, key=lambda x: x[1])
-            return latest_blob, latest_timestamp
-        
-        return None, None
-    except Exception as e:
-        logging.warning(f"Error checking cache files: {e}")
-        return None, None
+    return table
+
+
+async def load_fuel_consumption(app):
+    """
+    Load the fuel consumption table into app.state, along with a flat
+    (category, vessel_type, speed) -> tonnes per day lookup.
+    The JSON is only parsed again when the blob's generation has changed.
+    """
+    content = await get_cached_blob_content(app.state.bucket, FUEL_CONSUMPTION_FILE_NAME)
+    if content is None:
+        app.state.fuel = None
+        app.state.fuel_table = {}
+        app.state.fuel_body = None
+    elif content is not app.state.fuel_body:
+        fuel = orjson.loads(content)
+        app.state.fuel = fuel
+        app.state.fuel_table = build_fuel_table(fuel)
+        app.state.fuel_body = content
+
+
+async def ensure_fuel_consumption_loaded(app):
+    """
+    Load the fuel consumption table on demand if the startup load or the
+    last reload did not manage to, e.g. after a transient GCS error.
+    """
+    if app.state.fuel_body is None:
+        async with _fuel_load_lock:
+            if app.state.fuel_body is None:
+                await load_fuel_consumption(app)
+
+
+async def reload_fuel_consumption_periodically(app):
+    while True:
+        await asyncio.sleep(FUEL_RELOAD_MINUTES * 60)
+        try:
+            async with _fuel_load_lock:
+                await load_fuel_consumption(app)
+        except Exception as e:
+            logging.warning(f"Failed to reload fuel consumption data: {e}")
 
 
-def save_to_cache(data):
+def get_mem_cached_response():
     """
-    Save data to GCS with timestamp-based filename.
+    Return the in-process Singapore response if it is still fresh, None otherwise.
+    """
+    if time.time() < _mem_cache["expiry"] and _mem_cache["body"]:
+        return Response(content=_mem_cache["body"], media_type="application/json")
+    return None
+
+
+def set_mem_cache(body, expiry):
+    _mem_cache["body"] = body
+    _mem_cache["expiry"] = expiry
+
+
+def save_to_cache(bucket, body):
+    """
+    Save a JSON body to the GCS cache file, replacing the previous snapshot.
+    Freshness is taken from the blob's update time. The body is stored gzipped
+    since the repeated vessel keys compress well.
     """
     try:
-        client = get_gcs_client()
-        bucket = client.bucket(BUCKET_NAME)
-        
-        # Create filename with current timestamp
-        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d_%H-%M-%S')
-        cache_filename = f"{SINGAPORE_CACHE_FOLDER}{timestamp}.json"
-        
-        blob = bucket.blob(cache_filename)
-        blob.upload_from_string(json.dumps(data, indent=2))
+        blob = bucket.blob(SINGAPORE_CACHE_FILE_NAME)
+        blob.cache_control = "no-cache"
+        blob.content_encoding = "gzip"
+        blob.upload_from_string(gzip.compress(body, compresslevel=3), content_type="application/json")
+        # Remember what we just wrote so the next cache read in this process skips the download
+        _blob_cache[blob.name] = (blob.generation, body)
         
-        logging.info(f"Cached Singapore API data to {cache_filename}")
-        return cache_filename
+        logging.info(f"Cached Singapore API data to {SINGAPORE_CACHE_FILE_NAME}")
+        return SINGAPORE_CACHE_FILE_NAME
     except Exception as e:
         logging.error(f"Failed to save cache: {e}")
         return None
 
 
 @app.get("/positions")
-async def get_data():
+async def get_data(request: Request):
     try:
-        client = get_gcs_client()
-        bucket = client.bucket(BUCKET_NAME)
-        blob = bucket.blob(POSITION_FILE_NAME)
+        content = await get_cached_blob_content(request.app.state.bucket, POSITION_FILE_NAME)
 
-        if not blob.exists():
+        if content is None:
             raise HTTPException(status_code=404, detail="Data file not found.")
 
-        content = blob.download_as_text()
-        lines = content.strip().splitlines()
-
-        data = {}
-        for line in lines:
-            if ':' in line:
-                key, value = line.strip().split(':', 1)
-                key = key.strip().lower()
-                value = value.strip()
-                if key in ["latitude", "longitude"]:
-                    data[key] = float(value)
-                else:
-                    data[key] = value
-
-        return data
+        if content.startswith(b"{"):
+            return Response(content=content, media_type="application/json")
+
+        # Legacy text format, until the next POST overwrites it
+        match = _POSITION_RE.search(content)
+        if match is None:
+            raise HTTPException(status_code=500, detail="Malformed position data.")
+
+        return {
+            "time": match.group(1).decode(),
+            "latitude": float(match.group(2)),
+            "longitude": float(match.group(3)),
+        }
     except Exception as e:
         logging.exception("Failed to read from GCS")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/positions")
-async def submit_data(data: InputData):
+async def submit_data(request: Request, data: InputData):
     try:
-        content = (
-            f"Time: {data.time}\n"
-            f"Latitude: {data.lat}\n"
-            f"Longitude: {data.lon}\n"
-        )
-        client = get_gcs_client()
-        bucket = client.bucket(BUCKET_NAME)
-        blob = bucket.blob(POSITION_FILE_NAME)
-        blob.upload_from_string(content)
+        content = orjson.dumps({"time": data.time, "latitude": data.lat, "longitude": data.lon})
+        blob = request.app.state.position_blob
+        await asyncio.to_thread(blob.upload_from_string, content, content_type="application/json")
         return {"message": f"Data written to gs://{BUCKET_NAME}/{POSITION_FILE_NAME}"}
     except Exception as e:
         logging.exception("Failed to write to GCS")
@@ -175,19 +417,15 @@ async def submit_data(data: InputData):
     
     
 @app.get("/fuel-consumption")
-async def get_fuel_consumption_data():
+async def get_fuel_consumption_data(request: Request):
     try:
-        client = get_gcs_client()
-        bucket = client.bucket(BUCKET_NAME)
-        blob = bucket.blob(FUEL_CONSUMPTION_FILE_NAME)
+        await ensure_fuel_consumption_loaded(request.app)
+        content = request.app.state.fuel_body
 
-        if not blob.exists():
+        if content is None:
             raise HTTPException(status_code=404, detail="Data file not found.")
 
-        content = blob.download_as_text()
-        data = json.loads(content)
-
-        return data
+        return Response(content=content, media_type="application/json")
     except Exception as e:
         logging.exception("Failed to read from GCS")
         raise HTTPException(status_code=500, detail=str(e))
@@ -200,39 +438,31 @@ class FuelRequest(BaseModel):
 
     
 @app.post("/fuel-consumption")
-async def get_fuel_consumption_value(request: FuelRequest):
+async def get_fuel_consumption_value(request: Request, fuel_request: FuelRequest):
     try:
-        client = get_gcs_client()
-        bucket = client.bucket(BUCKET_NAME)
-        blob = bucket.blob(FUEL_CONSUMPTION_FILE_NAME)
+        await ensure_fuel_consumption_loaded(request.app)
+        data = request.app.state.fuel
 
-        if not blob.exists():
+        if data is None:
             raise HTTPException(status_code=404, detail="Data file not found.")
 
-        content = blob.download_as_text()
-        data = json.loads(content)
-
-        category = request.category
-        vessel_type = request.vessel_type
-        speed = round(float(request.speed))
+        category = fuel_request.category
+        vessel_type = fuel_request.vessel_type
 
         # Clamp speed to available range
-        clamped_speed = max(8, min(22, speed))
-
-        vessel_info = data.get(category, {}).get(vessel_type)
-        if not vessel_info:
-            raise HTTPException(status_code=404, detail="Vessel type not found.")
+        clamped_speed = max(8, min(22, round(fuel_request.speed)))
 
-        fuel_map = vessel_info.get("fuel_consumption_tpd", {})
-        fuel_value = fuel_map.get(str(clamped_speed))
+        fuel_value = request.app.state.fuel_table.get((category, vessel_type, clamped_speed))
 
         if fuel_value is None:
+            if not data.get(category, {}).get(vessel_type):
+                raise HTTPException(status_code=404, detail="Vessel type not found.")
             raise HTTPException(status_code=404, detail="Fuel data not available for this speed.")
 
         return {
             "category": category,
             "vessel_type": vessel_type,
-            "requested_speed": request.speed,
+            "requested_speed": fuel_request.speed,
             "used_speed": clamped_speed,
             "fuel_consumption_tpd": fuel_value
         }
@@ -242,8 +472,73 @@ async def get_fuel_consumption_value(request: FuelRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/ship", response_model=List[SingaporeApiResponse])
-async def get_singapore_ship_data(x_api_key: str = Header(..., alias="X-API-Key")):
+async def refresh_singapore_data(app, x_api_key):
+    """
+    Reload the Singapore ship data from the GCS cache, or from the Singapore API
+    when that is stale too, and store it in the in-process cache.
+    Returns the response body as JSON bytes.
+    """
+    # Check the GCS cache first, it may have been refreshed by another worker
+    cached_blob, cache_timestamp = await asyncio.to_thread(get_latest_cache_file, app.state.bucket)
+    
+    if cached_blob is not None:
+        logging.info(f"Using cached Singapore API data from {cache_timestamp}")
+        body = await download_cached(cached_blob)
+        if body is not None:
+            set_mem_cache(body, cache_timestamp.timestamp() + CACHE_EXPIRY_MINUTES * 60)
+            return body
+    
+    # No valid cache found, fetch from API
+    logging.info("No valid cache found, fetching fresh data from Singapore API")
+    
+    headers = {
+        'Content-Type': 'application/json',
+        'apikey': x_api_key,
+    }
+    
+    response = await app.state.http_client.get(
+        SINGAPORE_API_URL,
+        headers=headers
+    )
+    
+    if not response.is_success:
+        logging.error(f"Singapore API request failed: {response.status_code} - {response.text}")
+        raise HTTPException(
+            status_code=502, 
+            detail=f"Failed to fetch data from Singapore API: {response.status_code}"
+        )
+    
+    # Validate the payload against SingaporeApiResponse and drop any fields we don't expose
+    try:
+        ships, errors = decode_ships(response.content)
+    except msgspec.DecodeError as e:
+        logging.error(f"Unexpected Singapore API response: {e}")
+        raise HTTPException(status_code=502, detail=f"Unexpected response from Singapore API: {e}")
+    
+    if errors:
+        total = len(ships) + len(errors)
+        logging.error(f"Skipped {len(errors)} of {total} malformed vessel(s) in Singapore API response, first error: {errors[0]}")
+        # Mostly (or entirely) undecodable means the schema changed; fail without caching so the next request retries
+        if len(errors) > total * MAX_MALFORMED_VESSEL_SHARE:
+            raise HTTPException(
+                status_code=502,
+                detail=f"Unexpected response from Singapore API: {len(errors)} of {total} vessels malformed, first error: {errors[0]}"
+            )
+    
+    body = _SHIPS_ENC.encode(ships)
+    set_mem_cache(body, time.time() + CACHE_EXPIRY_MINUTES * 60)
+    
+    # Upload to GCS in the background so the response does not wait on it
+    upload_task = asyncio.create_task(asyncio.to_thread(save_to_cache, app.state.bucket, body))
+    _background_tasks.add(upload_task)
+    upload_task.add_done_callback(_background_tasks.discard)
+    
+    logging.info("Fetched and cached fresh Singapore API data")
+    return body
+
+
+@app.get("/api/ship", responses={200: {"model": List[SingaporeShipSchema]}})
+async def get_singapore_ship_data(request: Request, x_api_key: str = Header(..., alias="X-API-Key")):
     """
     Endpoint to fetch ship data from Singapore API with caching.
     Checks for cached data within 10 minutes, otherwise fetches fresh data.
@@ -256,78 +551,24 @@ async def get_singapore_ship_data(x_api_key: str = Header(..., alias="X-API-Key"
         if not x_api_key or x_api_key.strip() == "":
             raise HTTPException(status_code=400, detail="API key is required")
         
-        # Check for cached data first
-        cached_blob, cache_timestamp = get_latest_cache_file()
-        
-        if cached_blob is not None:
-            logging.info(f"Using cached Singapore API data from {cache_timestamp}")
-            cached_content = cached_blob.download_as_text()
-            cached_data = json.loads(cached_content)
-            return cached_data
+        # Serve from memory while the last response is still fresh
+        cached_response = get_mem_cached_response()
+        if cached_response is not None:
+            return cached_response
         
-        # No valid cache found, fetch from API
-        logging.info("No valid cache found, fetching fresh data from Singapore API")
-        
-        headers = {
-            'Content-Type': 'application/json',
-            'apikey': x_api_key,
-        }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                SINGAPORE_API_URL,
-                headers=headers,
-                timeout=30.0
-            )
-            
-            if not response.is_success:
-                logging.error(f"Singapore API request failed: {response.status_code} - {response.text}")
-                raise HTTPException(
-                    status_code=502, 
-                    detail=f"Failed to fetch data from Singapore API: {response.status_code}"
-                )
-            
-            # Parse the response data
-            api_data = response.json()
-            
-            # Transform the data to match our response model if needed
-            # You may need to adjust this based on the actual API response structure
-            transformed_data = []
-            for ship in api_data:
-                vessel_particulars = ship.get("vesselParticulars", ship)
-                transformed_ship = {
-                   "vesselParticulars": {
-                        "vesselName": vessel_particulars.get("vesselName") or vessel_particulars.get("vessel_name", ""),
-                        "callSign": vessel_particulars.get("callSign") or vessel_particulars.get("call_sign", ""),
-                        "imoNumber": vessel_particulars.get("imoNumber") or vessel_particulars.get("imo_number", ""),
-                        "flag": vessel_particulars.get("flag", ""),
-                        "vesselLength": float(vessel_particulars.get("vesselLength") or vessel_particulars.get("vessel_length", 0)),
-                        "vesselBreadth": float(vessel_particulars.get("vesselBreadth") or vessel_particulars.get("vessel_breadth", 0)),
-                        "vesselDepth": float(vessel_particulars.get("vesselDepth") or vessel_particulars.get("vessel_depth", 0)),
-                        "vesselType": vessel_particulars.get("vesselType") or vessel_particulars.get("vessel_type", ""),
-                        "grossTonnage": float(vessel_particulars.get("grossTonnage") or vessel_particulars.get("gross_tonnage", 0)),
-                        "netTonnage": float(vessel_particulars.get("netTonnage") or vessel_particulars.get("net_tonnage", 0)),
-                        "deadweight": float(vessel_particulars.get("deadweight", 0)),
-                        "mmsiNumber": vessel_particulars.get("mmsiNumber") or vessel_particulars.get("mmsi_number", ""),
-                        "yearBuilt": vessel_particulars.get("yearBuilt") or vessel_particulars.get("year_built", "")
-                    },
-                    "latitude": float(ship.get("latitude", 0)),
-                    "longitude": float(ship.get("longitude", 0)),
-                    "latitudeDegrees": float(ship.get("latitudeDegrees", ship.get("latitude", 0))),
-                    "longitudeDegrees": float(ship.get("longitudeDegrees", ship.get("longitude", 0))),
-                    "speed": float(ship.get("speed", 0)),
-                    "course": float(ship.get("course", 0)),
-                    "heading": float(ship.get("heading", 0)),
-                    "timeStamp": ship.get("timeStamp", "")
-                }
-                transformed_data.append(transformed_ship)
-            
-            # Save the fetched data to cache
-            save_to_cache(transformed_data)
-            
-            logging.info("Fetched and cached fresh Singapore API data")
-            return transformed_data
+        # Concurrent misses with the same key share a single refresh instead of each calling the API
+        task = _refresh_tasks.get(x_api_key)
+        if task is None:
+            task = asyncio.create_task(refresh_singapore_data(request.app, x_api_key))
+            task.add_done_callback(lambda _: _refresh_tasks.pop(x_api_key, None))
+            _refresh_tasks[x_api_key] = task
         
+        # Shielded so a disconnecting client does not cancel the refresh for the others
+        body = await asyncio.shield(task)
+        return Response(content=body, media_type="application/json")
+    
+    except HTTPException:
+        raise
     except httpx.RequestError as e:
         logging.exception("Network error when calling Singapore API")
         raise HTTPException(status_code=502, detail=f"Network error: {str(e)}")
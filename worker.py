@@ -0,0 +1,7 @@
+from uvicorn_worker import UvicornWorker
+
+
+# Gunicorn worker used by the Procfile
+class UvloopWorker(UvicornWorker):
+    # Require uvloop and httptools instead of silently falling back to asyncio/h11
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}